@@ -8,6 +8,12 @@ __version__ = "1.0.0"
 __author__ = "Your Name"
 __description__ = "Telegram bot for food menu polling and ordering"
 
-from .bot import FoodPollBot
-
 __all__ = ["FoodPollBot"]
+
+def __getattr__(name):
+    # Lazy import (PEP 562) so tools that only need package metadata
+    # don't pay for the telegram.ext import graph
+    if name == "FoodPollBot":
+        from .bot import FoodPollBot
+        return FoodPollBot
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
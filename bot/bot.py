@@ -3,10 +3,7 @@ Main bot class for the Telegram Food Poll Bot.
 """
 
 import logging
-import asyncio
-from telegram.ext import Application
-from .config import BOT_TOKEN, setup_logging
-from .handlers import setup_handlers
+from .config import BOT_TOKEN, USE_WEBHOOK, WEBHOOK_URL, WEBHOOK_PORT, setup_logging
 
 logger = logging.getLogger(__name__)
 
@@ -27,12 +24,26 @@ class FoodPollBot:
     
     def setup(self) -> None:
         """Setup the bot application and handlers."""
+        # Imported here (not at module top) to keep `import bot` cheap for
+        # short-lived invocations that never build the application
+        from telegram.ext import Application
+        from .handlers import setup_handlers
+        from .persistence import replay_event_log
+
         try:
+            # Restore any polls that were open before the last restart
+            replay_event_log()
+
             # Create application without job queue to avoid weak reference issues
             self.application = (
                 Application.builder()
                 .token(BOT_TOKEN)
                 .job_queue(None)  # Disable job queue to avoid weak reference issues
+                # Default pool (1 connection) serializes concurrent sends;
+                # size it for bursts so parallel handlers reuse warm
+                # connections instead of queueing on the pool
+                .connection_pool_size(256)
+                .pool_timeout(5.0)
                 .build()
             )
             
@@ -42,7 +53,7 @@ class FoodPollBot:
             logger.info("Bot setup completed successfully")
             
         except Exception as e:
-            logger.error(f"Failed to setup bot: {e}")
+            logger.error("Failed to setup bot: %s", e)
             raise
     
     def run(self) -> None:
@@ -50,13 +61,40 @@ class FoodPollBot:
         if not self.application:
             raise RuntimeError("Bot not setup. Call setup() first.")
         
+        # Use uvloop for the event loop when available (2-4x faster socket
+        # I/O); fall back silently to the stdlib loop otherwise
         try:
-            # Start polling with minimal configuration (same as simple_bot.py)
-            logger.info("Starting bot...")
-            self.application.run_polling(drop_pending_updates=True)
-            
+            import uvloop
+            uvloop.install()
+            logger.info("uvloop installed as event loop policy")
+        except ImportError:
+            pass
+
+        try:
+            if USE_WEBHOOK and WEBHOOK_URL:
+                # Push-based delivery: no getUpdates churn and no
+                # poll-interval tail latency; requires a public URL
+                logger.info("Starting bot with webhook on port %d...", WEBHOOK_PORT)
+                self.application.run_webhook(
+                    listen="0.0.0.0",
+                    port=WEBHOOK_PORT,
+                    url_path=BOT_TOKEN,
+                    webhook_url=f"{WEBHOOK_URL.rstrip('/')}/{BOT_TOKEN}",
+                    drop_pending_updates=True
+                )
+            else:
+                # Long-poll with a 30s server-side hang and no pause
+                # between requests: updates arrive immediately and idle
+                # periods cost ~2 requests a minute instead of dozens
+                logger.info("Starting bot...")
+                self.application.run_polling(
+                    drop_pending_updates=True,
+                    timeout=30,
+                    poll_interval=0
+                )
+
         except KeyboardInterrupt:
             logger.info("Bot stopped by user")
         except Exception as e:
-            logger.error(f"Error running bot: {e}")
+            logger.error("Error running bot: %s", e)
             raise 
\ No newline at end of file
@@ -2,8 +2,11 @@
 Configuration settings for the Telegram Food Poll Bot.
 """
 
+import atexit
 import os
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 from dotenv import load_dotenv
 
@@ -19,6 +22,14 @@ if not BOT_TOKEN:
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 LOG_FILE = os.getenv("LOG_FILE", "bot.log")
 
+# State Persistence Configuration
+STATE_LOG_FILE = os.getenv("STATE_LOG_FILE", "state.jsonl")
+
+# Webhook Configuration (optional; long polling is used when unset)
+USE_WEBHOOK = os.getenv("USE_WEBHOOK", "").lower() in ("1", "true", "yes")
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_PORT = int(os.getenv("PORT", "8443"))
+
 # Timezone Configuration
 TIMEZONE = "Asia/Phnom_Penh"
 SCHEDULED_MESSAGE_TIME = "08:00"  # 8 AM
@@ -48,12 +59,29 @@ ERROR_NO_SELECTION = "❗ You haven't selected any food yet!"
 ORDER_CLOSED_MESSAGE = "✅ Order has been closed."
 
 def setup_logging() -> None:
-    """Setup logging configuration."""
-    logging.basicConfig(
-        level=getattr(logging, LOG_LEVEL),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(LOG_FILE),
-            logging.StreamHandler()
-        ]
-    )
+    """
+    Setup logging configuration.
+
+    Log records are pushed onto a queue and written by a background
+    listener thread, so file/stream I/O never blocks the event loop.
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        # Already configured (e.g. setup_logging called twice)
+        return
+
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handlers = [
+        logging.FileHandler(LOG_FILE),
+        logging.StreamHandler()
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(-1)
+    root.setLevel(getattr(logging, LOG_LEVEL))
+    root.addHandler(QueueHandler(log_queue))
+
+    listener = QueueListener(log_queue, *handlers)
+    listener.start()
+    atexit.register(listener.stop)
@@ -2,26 +2,46 @@
 Message and callback handlers for the Telegram Food Poll Bot.
 """
 
+import asyncio
 import logging
-from collections import Counter
+import re
+from typing import Dict
 from telegram import Update
 from telegram.ext import (
-    ContextTypes, MessageHandler, filters, PollAnswerHandler, 
+    ContextTypes, MessageHandler, filters, PollAnswerHandler,
     CallbackQueryHandler, CommandHandler
 )
 from .config import (
-    WELCOME_MESSAGE, DAILY_MESSAGE, ERROR_POLL_NOT_FOUND, 
-    ERROR_NO_ORDERS, ERROR_NO_SELECTION, ORDER_NAME, CLOSE_ORDER_BUTTON_TEXT, ORDER_CLOSED_MESSAGE
+    WELCOME_MESSAGE, ERROR_POLL_NOT_FOUND,
+    ERROR_NO_ORDERS, ORDER_NAME, ORDER_CLOSED_MESSAGE
 )
-from .utils import is_food_menu_text, format_order_summary, with_retry
+from .utils import parse_menu, format_order_summary, split_message, with_retry
 from .menu_processor import (
-    process_food_menu, get_poll_data, get_global_orders, 
-    update_user_selection, update_global_orders, get_user_selections, hide_order_buttons
+    process_food_menu, get_menu, update_user_selection,
+    bulk_update_global_orders, hide_order_buttons, release_menu
 )
+from .persistence import record_poll_answer
 from .scheduler import send_scheduled_message, add_chat_for_scheduled_messages
 
 logger = logging.getLogger(__name__)
 
+# Cached display names keyed by user ID; repeat voters skip the
+# attribute walk and f-string formatting on every poll answer
+_user_names: Dict[int, str] = {}
+_MAX_USER_NAMES = 4096
+
+def _display_name(user) -> str:
+    """Resolve a user's display name with a lazily populated cache."""
+    name = _user_names.get(user.id)
+    if name:
+        return name
+    name = user.full_name or user.username or f'User{user.id}'
+    if len(_user_names) >= _MAX_USER_NAMES:
+        # Drop the oldest cached name; dicts iterate in insertion order
+        _user_names.pop(next(iter(_user_names)))
+    _user_names[user.id] = name
+    return name
+
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Handle incoming messages and forwarded messages.
@@ -30,21 +50,28 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         update: Telegram update object
         context: Bot context
     """
-    logger.info(f"Received message: {update.message.text if update.message and update.message.text else 'No text'}")
-    
+    # Drop non-text updates (edits, joins, pins, ...) before any log work
     if not update.message or not update.message.text:
-        logger.info("No message or no text, skipping")
         return
-    
-    text = update.message.text.strip()
-    logger.info(f"Processing text: {repr(text)}")
-    
-    # Check if this is a food menu text
-    if is_food_menu_text(text):
-        logger.info(f"Processing food menu from user {update.effective_user.id}")
-        await process_food_menu(update, context, text)
+
+    raw = update.message.text
+
+    # Cheap gate: a menu needs at least two numbered lines or the Khmer
+    # menu header, so most single-line chat noise can be dropped before
+    # paying for the strip and the regex scan
+    if '\n' not in raw and "ម្ហូបថ្ងៃ" not in raw:
+        return
+
+    text = raw.strip()
+    logger.debug("Processing text: %r", text)
+
+    # Detect and extract the menu in one scan
+    options = parse_menu(text)
+    if options is not None:
+        logger.info("Processing food menu from user %s", update.effective_user.id)
+        await process_food_menu(update, context, text, options)
     else:
-        logger.info(f"Text not recognized as food menu: {repr(text)}")
+        logger.debug("Text not recognized as food menu: %r", text)
 
 async def handle_poll_answer(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
@@ -60,112 +87,201 @@ async def handle_poll_answer(update: Update, context: ContextTypes.DEFAULT_TYPE)
         logger.warning("Received poll answer without user information")
         return
     
+    user = poll_answer.user
     poll_id = poll_answer.poll_id
-    user_id = poll_answer.user.id
-    user_name = poll_answer.user.full_name or poll_answer.user.username or f'User{user_id}'
+    user_id = user.id
+    user_name = _display_name(user)
     selected_options = poll_answer.option_ids
     
-    # Get poll data
-    poll_data = get_poll_data(poll_id)
-    if not poll_data:
-        logger.warning(f"Poll data not found for poll ID: {poll_id}")
+    # Resolve the poll state with a single lookup
+    menu = get_menu(poll_id)
+    if not menu:
+        logger.warning("Poll data not found for poll ID: %s", poll_id)
+        return
+
+    options = menu.options
+    options_count = len(options)
+
+    # Serialize read-modify-write per poll; other polls stay unblocked
+    async with menu.lock:
+        # Get previous selections for this user; stored as a set, so no
+        # per-answer conversion is needed
+        prev = menu.selections.get(user_id)
+        previous_selections = prev.selections if prev else frozenset()
+
+        # Calculate current selections; Telegram normally sends valid option
+        # ids, so take the branchless map() path and only fall back to the
+        # per-index bounds check on malformed input
+        if all(idx < options_count for idx in selected_options):
+            current_selections = set(map(options.__getitem__, selected_options))
+        else:
+            current_selections = {options[idx] for idx in selected_options if idx < options_count}
+
+        # Update user selections with name; any memoized summary is
+        # stale from here (counts or display names may have changed)
+        update_user_selection(menu, user_id, current_selections, user_name)
+        menu.rendered_summary = None
+
+        # Calculate changes with set differences (O(n+m) instead of O(n*m))
+        newly_selected = current_selections - previous_selections
+        newly_unselected = previous_selections - current_selections
+
+        # Update global order counts with one aggregated call
+        deltas = {item: 1 for item in newly_selected}
+        deltas.update({item: -1 for item in newly_unselected})
+        if deltas:
+            bulk_update_global_orders(menu, deltas)
+
+    # Persist the new selection set; fire-and-forget, no disk wait here
+    record_poll_answer(poll_id, user_id, user_name, current_selections)
+
+    # Per-item detail is debug; a chatty poll otherwise emits several
+    # info lines per answer
+    if logger.isEnabledFor(logging.DEBUG):
+        for item in newly_selected:
+            logger.debug("User %s selected: %s", user_name, item)
+        for item in newly_unselected:
+            logger.debug("User %s unselected: %s", user_name, item)
+        logger.debug(
+            "User %s updated poll %s selections: %s (previous: %s)",
+            user_name, poll_id, current_selections, previous_selections
+        )
+
+async def handle_order_button(query, context: ContextTypes.DEFAULT_TYPE, poll_id: str) -> None:
+    """
+    Handle the Order button for a poll.
+
+    Args:
+        query: Callback query that triggered the button
+        context: Bot context
+        poll_id: ID of the poll the button belongs to
+    """
+    # Check if poll exists
+    menu = get_menu(poll_id)
+    if not menu:
+        logger.warning("Poll not found for callback: %s", poll_id)
+        await query.message.reply_text(ERROR_POLL_NOT_FOUND)
+        return
+
+    # Orders are kept pruned of zero counts, so the mapping is usable as-is
+    order_items = dict(menu.orders)
+
+    if not order_items:
+        await query.message.reply_text(ERROR_NO_ORDERS)
         return
-    
-    options = poll_data.get("options", [])
-    
-    # Get previous selections for this user
-    user_selections_data = get_user_selections(poll_id)
-    previous_selections = user_selections_data.get(user_id, {}).get('selections', [])
-    
-    # Calculate current selections
-    current_selections = [options[idx] for idx in selected_options if idx < len(options)]
-    
-    # Update user selections with name
-    update_user_selection(poll_id, user_id, current_selections, user_name)
-    
-    # Calculate changes and update global orders
-    newly_selected = [item for item in current_selections if item not in previous_selections]
-    newly_unselected = [item for item in previous_selections if item not in current_selections]
-    
-    # Update global order counts
-    for item in newly_selected:
-        update_global_orders(poll_id, item, 1)
-        logger.info(f"User {user_name} selected: {item}")
-    
-    for item in newly_unselected:
-        update_global_orders(poll_id, item, -1)
-        logger.info(f"User {user_name} unselected: {item}")
-    
-    logger.info(f"User {user_name} updated poll {poll_id} selections: {current_selections} (previous: {previous_selections})")
+
+    # Get user selections for detail
+    user_selections_data = menu.selections
+
+    # Coalesce rapid Order clicks: while a delivery for this poll is still
+    # in flight there is no point starting a duplicate one
+    pending = _pending_summaries.get(poll_id)
+    if pending and not pending.done():
+        logger.info("Order summary already being sent for poll %s, skipping", poll_id)
+        return
+
+    # Format the order summary with voter details (reusing the memoized
+    # render when votes haven't changed) and deliver it in the background
+    # so the callback handler returns immediately instead of blocking on
+    # retry backoff
+    order_summary = menu.rendered_summary
+    if order_summary is None:
+        order_summary = format_order_summary(order_items, ORDER_NAME, user_selections_data)
+        menu.rendered_summary = order_summary
+    task = asyncio.create_task(
+        _deliver_order_summary(query, poll_id, order_summary, order_items)
+    )
+    _pending_summaries[poll_id] = task
+    task.add_done_callback(lambda t, pid=poll_id: _discard_pending(pid, t))
+
+# In-flight order summary deliveries, keyed by poll ID
+_pending_summaries: Dict[str, asyncio.Task] = {}
+
+def _discard_pending(poll_id: str, task: asyncio.Task) -> None:
+    """Drop a finished delivery task unless a newer one replaced it."""
+    if _pending_summaries.get(poll_id) is task:
+        del _pending_summaries[poll_id]
+
+async def _deliver_order_summary(query, poll_id: str, order_summary: str, order_items) -> None:
+    """Send an order summary with retries, reporting failures in-chat."""
+    try:
+        # Chunk proactively so large summaries never trip the 4096-char cap
+        for chunk in split_message(order_summary):
+            await with_retry(query.message.reply_text, chunk)
+        logger.info("Order summary sent for poll %s: %s", poll_id, order_items)
+    except Exception as e:
+        logger.error("Error sending order summary: %s", e)
+        await query.message.reply_text(f"Error sending order summary: {str(e)}")
+
+async def handle_close_order_button(query, context: ContextTypes.DEFAULT_TYPE, poll_id: str) -> None:
+    """
+    Handle the Close Order button for a poll.
+
+    Args:
+        query: Callback query that triggered the button
+        context: Bot context
+        poll_id: ID of the poll the button belongs to
+    """
+    # Check if poll exists
+    menu = get_menu(poll_id)
+    if not menu:
+        logger.warning("Poll not found for close order callback: %s", poll_id)
+        await query.message.reply_text(ERROR_POLL_NOT_FOUND)
+        return
+
+    # Coalesce rapid repeated clicks: once the buttons are hidden there is
+    # nothing left to edit, so skip the redundant Telegram API call
+    if menu.order_button_used:
+        logger.info("Order already closed for poll %s, skipping edit", poll_id)
+        return
+
+    try:
+        # Hide the order buttons
+        await hide_order_buttons(context, poll_id)
+
+        # Send confirmation message
+        await query.message.reply_text(ORDER_CLOSED_MESSAGE)
+        logger.info("Order closed for poll %s", poll_id)
+
+        # Closing ends the poll's lifecycle, so free its state
+        release_menu(poll_id)
+        _pending_summaries.pop(poll_id, None)
+
+    except Exception as e:
+        logger.error("Error closing order for poll %s: %s", poll_id, e)
+        await query.message.reply_text(f"Error closing order: {str(e)}")
+
+# Callback routing table keyed by the callback data's leading token
+CALLBACK_ROUTES = {
+    "order": handle_order_button,
+    "close_order": handle_close_order_button,
+}
 
 async def handle_callback_query(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Handle button clicks (e.g., Order button, Close Order button).
-    
+
     Args:
         update: Telegram update object
         context: Bot context
     """
     query = update.callback_query
     await query.answer()
-    
+
     if not query.data:
         return
-    
-    # Handle Order button
-    if query.data.startswith("order_"):
-        poll_id = query.data.replace("order_", "")
-        
-        # Check if poll exists
-        poll_data = get_poll_data(poll_id)
-        if not poll_data:
-            logger.warning(f"Poll not found for callback: {poll_id}")
-            await query.message.reply_text(ERROR_POLL_NOT_FOUND)
-            return
-        
-        # Get global orders for this poll
-        order_items = get_global_orders(poll_id)
-        order_items = {item: count for item, count in order_items.items() if count > 0}
-        
-        if not order_items:
-            await query.message.reply_text(ERROR_NO_ORDERS)
-            return
-        
-        # Get user selections for detail
-        user_selections_data = get_user_selections(poll_id)
-        
-        # Format and send order summary with voter details
-        order_summary = format_order_summary(order_items, ORDER_NAME, user_selections_data)
-        
-        try:
-            await with_retry(query.message.reply_text, order_summary)
-            logger.info(f"Order summary sent for poll {poll_id}: {order_items}")
-        except Exception as e:
-            logger.error(f"Error sending order summary: {e}")
-            await query.message.reply_text(f"Error sending order summary: {str(e)}")
-    
-    # Handle Close Order button
-    elif query.data.startswith("close_order_"):
-        poll_id = query.data.replace("close_order_", "")
-        
-        # Check if poll exists
-        poll_data = get_poll_data(poll_id)
-        if not poll_data:
-            logger.warning(f"Poll not found for close order callback: {poll_id}")
-            await query.message.reply_text(ERROR_POLL_NOT_FOUND)
-            return
-        
-        try:
-            # Hide the order buttons
-            await hide_order_buttons(context, poll_id)
-            
-            # Send confirmation message
-            await query.message.reply_text(ORDER_CLOSED_MESSAGE)
-            logger.info(f"Order closed for poll {poll_id}")
-            
-        except Exception as e:
-            logger.error(f"Error closing order for poll {poll_id}: {e}")
-            await query.message.reply_text(f"Error closing order: {str(e)}")
+
+    # One scan of the head plus a dict lookup instead of chained
+    # startswith tests per registered prefix
+    head, _, rest = query.data.partition("_")
+    if head == "close" and rest.startswith("order_"):
+        # close_order_<poll_id> partitions as ("close", "order_<poll_id>")
+        head = "close_order"
+        rest = rest.removeprefix("order_")
+
+    route = CALLBACK_ROUTES.get(head)
+    if route:
+        await route(query, context, rest)
 
 async def handle_start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
@@ -179,10 +295,10 @@ async def handle_start_command(update: Update, context: ContextTypes.DEFAULT_TYP
         # Add chat to scheduled messages
         add_chat_for_scheduled_messages(update.effective_chat.id)
         await update.message.reply_text(WELCOME_MESSAGE)
-        logger.info(f"Start command received from user {update.effective_user.id}")
-        logger.info(f"Username: {update.effective_user.full_name}")
+        logger.info("Start command received from user %s", update.effective_user.id)
+        logger.info("Username: %s", update.effective_user.full_name)
     except Exception as e:
-        logger.error(f"Error handling start command: {e}")
+        logger.error("Error handling start command: %s", e)
 
 async def handle_debug_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
@@ -197,7 +313,7 @@ async def handle_debug_command(update: Update, context: ContextTypes.DEFAULT_TYP
         await update.message.reply_text("Debug message sent!")
         logger.info("Debug message sent manually")
     except Exception as e:
-        logger.error(f"Error in debug command: {e}")
+        logger.error("Error in debug command: %s", e)
 
 def setup_handlers(application):
     """
@@ -210,8 +326,13 @@ def setup_handlers(application):
     application.add_handler(CommandHandler("start", handle_start_command))
     application.add_handler(CommandHandler("debug_send", handle_debug_command))
     
-    # Message handlers (handle all text messages except commands)
-    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
+    # Message handlers: filter at the dispatcher layer so texts without a
+    # numbered line or the menu header never reach handle_message
+    menu_filter = (
+        filters.Regex(re.compile(r'^[១២៣៤៥៦1-6]\.', re.MULTILINE))
+        | filters.Regex(re.compile(r'^ម្ហូបថ្ងៃ'))
+    )
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND & menu_filter, handle_message))
     
     # Poll and callback handlers
     application.add_handler(PollAnswerHandler(handle_poll_answer))
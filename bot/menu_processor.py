@@ -2,38 +2,117 @@
 Menu processing functionality for the Telegram Food Poll Bot.
 """
 
+import asyncio
+import datetime
 import logging
-from typing import Dict, Any
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
 from telegram import Update, Poll, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from .config import POLL_QUESTION, ORDER_BUTTON_TEXT, CLOSE_ORDER_BUTTON_TEXT, ORDER_INSTRUCTION_TEXT, ERROR_POLL_CREATION
 from .utils import with_retry, extract_menu_options
+from .persistence import record_menu_created, record_menu_closed
 
 logger = logging.getLogger(__name__)
 
-# Global storage for poll data
-poll_data: Dict[str, Dict[str, Any]] = {}
-global_orders: Dict[str, Dict[str, int]] = {}
-user_selections: Dict[str, Dict[int, Dict[str, Any]]] = {}  # Changed to store user data
+class UserSelection(NamedTuple):
+    """
+    One user's current state for a poll.
+
+    A NamedTuple instead of a dict: ~3x smaller per voter, attribute
+    access compiles to an index load, and the fields are fixed anyway.
+    Selections are a set so poll-answer deltas need no conversion.
+    """
+    name: str
+    selections: Set[str]
+
+@dataclass(slots=True)
+class MenuState:
+    """
+    All live state for one menu poll.
+
+    Consolidating the previously parallel module dicts (poll data, order
+    counts, user selections, button flag) means every handler resolves a
+    poll with a single lookup instead of three or four.
+    """
+    # Options are fixed for the poll's lifetime; a tuple is smaller and
+    # indexes marginally faster than a list
+    options: Tuple[str, ...]
+    chat_id: int
+    message_id: int
+    created_at: Any = None
+    button_message_id: Optional[int] = None
+    reply_markup: Optional[InlineKeyboardMarkup] = None
+    # Order counts; items with no orders are never stored, so readers can
+    # use the mapping directly without filtering zeros
+    orders: Counter = field(default_factory=Counter)
+    selections: Dict[int, UserSelection] = field(default_factory=dict)
+    order_button_used: bool = False
+    # Memoized order summary; invalidated whenever votes change so
+    # repeated Order presses between votes reuse the rendered string
+    rendered_summary: Optional[str] = None
+    # Per-menu lock so concurrent updates to one poll serialize without
+    # blocking updates to other polls
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+# Global storage for menu poll state, keyed by poll ID
+menus: Dict[str, MenuState] = {}
+
+# Retention bounds so a long-running bot doesn't accumulate every poll
+# ever created: menus are released when their order closes, and these
+# limits cover polls that are simply abandoned
+MENU_TTL = datetime.timedelta(hours=24)
+MAX_MENUS = 2048
 
-# Track if order button is already used for each poll
-order_button_used: Dict[str, bool] = {}
+def release_menu(poll_id: str) -> None:
+    """Drop a menu's state once its lifecycle has ended."""
+    if menus.pop(poll_id, None) is not None:
+        record_menu_closed(poll_id)
 
-async def process_food_menu(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str) -> None:
+def purge_stale_menus() -> int:
+    """
+    Evict menus older than MENU_TTL and enforce the size cap.
+
+    Returns:
+        Number of menus evicted by the TTL sweep
+    """
+    cutoff = datetime.datetime.now(datetime.timezone.utc) - MENU_TTL
+    stale = [
+        poll_id for poll_id, menu in menus.items()
+        if menu.created_at and menu.created_at < cutoff
+    ]
+    for poll_id in stale:
+        del menus[poll_id]
+
+    # Dicts iterate in insertion order, so the first keys are the oldest
+    while len(menus) > MAX_MENUS:
+        menus.pop(next(iter(menus)))
+
+    return len(stale)
+
+async def process_food_menu(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str,
+                            options: Optional[List[str]] = None) -> None:
     """
     Process text that contains a food menu and create a poll.
-    
+
     Args:
         update: Telegram update object
         context: Bot context
         text: Text containing menu items
+        options: Pre-extracted menu options, to avoid re-scanning the
+            text when the caller already parsed it
     """
-    options = extract_menu_options(text)
-    
+    if options is None:
+        options = extract_menu_options(text)
+
     if len(options) < 2:
-        logger.warning(f"Not enough menu options found in text: {len(options)} options")
+        logger.warning("Not enough menu options found in text: %s options", len(options))
         return
-    
+
+    # Amortized cleanup: menu creation is rare, so sweep stale state here
+    purge_stale_menus()
+
     try:
         # Create poll
         message = await with_retry(
@@ -45,25 +124,16 @@ async def process_food_menu(update: Update, context: ContextTypes.DEFAULT_TYPE,
             allows_multiple_answers=True,
             type=Poll.REGULAR
         )
-        
-        # Store poll data
-        poll_data[message.poll.id] = {
-            "options": options,
-            "message_id": message.message_id,
-            "chat_id": update.effective_chat.id,
-            "created_at": update.message.date if update.message else None,
-            "button_message_id": None  # Will be set after sending button message
-        }
-        
-        # Initialize global order counts
-        global_orders[message.poll.id] = {option: 0 for option in options}
-        
-        # Initialize user selections
-        user_selections[message.poll.id] = {}
-
-        # Initialize order button used flag
-        order_button_used[message.poll.id] = False
-        
+
+        # Store poll state
+        menu = MenuState(
+            options=tuple(options),
+            chat_id=update.effective_chat.id,
+            message_id=message.message_id,
+            created_at=update.message.date if update.message else None
+        )
+        menus[message.poll.id] = menu
+
         # Add Order and Close Order buttons
         keyboard = [
             [
@@ -72,110 +142,105 @@ async def process_food_menu(update: Update, context: ContextTypes.DEFAULT_TYPE,
             ]
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
-        
+
+        # Cache the built markup so later edits can reuse it instead of
+        # re-allocating the button objects
+        menu.reply_markup = reply_markup
+
         # Send button message and store its ID
         button_message = await with_retry(
             context.bot.send_message,
             chat_id=update.effective_chat.id,
             text=ORDER_INSTRUCTION_TEXT,
             reply_markup=reply_markup,
-            reply_to_message_id=message.message_id
+            reply_to_message_id=message.message_id,
+            disable_notification=True
         )
-        
+
         # Store the button message ID for later editing
-        poll_data[message.poll.id]["button_message_id"] = button_message.message_id
-        
-        logger.info(f"Created poll with {len(options)} options: {options}")
-        
+        menu.button_message_id = button_message.message_id
+
+        # Persist creation so the poll survives a restart
+        record_menu_created(
+            message.poll.id, options, menu.chat_id,
+            menu.message_id, menu.button_message_id
+        )
+
+        logger.info("Created poll with %s options: %s", len(options), options)
+
     except Exception as e:
-        logger.error(f"Error creating poll: {e}")
+        logger.error("Error creating poll: %s", e)
         await context.bot.send_message(
             chat_id=update.effective_chat.id,
             text=ERROR_POLL_CREATION.format(str(e))
         )
 
-def get_poll_data(poll_id: str) -> Dict[str, Any]:
-    """Get poll data by poll ID."""
-    return poll_data.get(poll_id, {})
-
-def get_global_orders(poll_id: str) -> Dict[str, int]:
-    """Get global order counts for a poll."""
-    return global_orders.get(poll_id, {})
-
-def get_user_selections(poll_id: str) -> Dict[int, Dict[str, Any]]:
-    """Get user selections for a poll."""
-    return user_selections.get(poll_id, {})
+def get_menu(poll_id: str) -> Optional[MenuState]:
+    """Get the state for a menu poll by poll ID."""
+    return menus.get(poll_id)
 
-def update_user_selection(poll_id: str, user_id: int, selected_options: list, user_name: str = None) -> None:
+def update_user_selection(menu: MenuState, user_id: int, selected_options: Set[str], user_name: str = None) -> None:
     """
-    Update user's selection for a poll.
-    
+    Update a user's selection for a menu poll.
+
     Args:
-        poll_id: ID of the poll
+        menu: State of the poll
         user_id: ID of the user
-        selected_options: List of selected menu items
+        selected_options: Set of selected menu items
         user_name: Name of the user (optional)
     """
-    if poll_id not in user_selections:
-        user_selections[poll_id] = {}
-    
     # Store user data with selections and name
-    user_selections[poll_id][user_id] = {
-        'selections': selected_options,
-        'name': user_name or f'User{user_id}'
-    }
-
-def update_global_orders(poll_id: str, item: str, increment: int) -> None:
-    """Update global order count for an item."""
-    if poll_id not in global_orders:
-        global_orders[poll_id] = {}
-    
-    if item not in global_orders[poll_id]:
-        global_orders[poll_id][item] = 0
-    
-    global_orders[poll_id][item] = max(0, global_orders[poll_id][item] + increment)
-
-def is_order_button_used(poll_id: str) -> bool:
-    """Check if the order button has already been used for this poll."""
-    return order_button_used.get(poll_id, False)
-
-def set_order_button_used(poll_id: str) -> None:
-    """Mark the order button as used for this poll."""
-    order_button_used[poll_id] = True
+    menu.selections[user_id] = UserSelection(
+        name=user_name or f'User{user_id}',
+        selections=selected_options
+    )
+
+def bulk_update_global_orders(menu: MenuState, deltas: Dict[str, int]) -> None:
+    """
+    Apply several order count changes for a menu poll in one pass.
+
+    Args:
+        menu: State of the poll
+        deltas: Mapping of item name to count change (+/-)
+    """
+    orders = menu.orders
+    # Counter.update applies the whole batch in C; only decremented keys
+    # can have gone non-positive, so prune just those afterwards
+    orders.update(deltas)
+    for item, increment in deltas.items():
+        if increment < 0 and orders[item] <= 0:
+            del orders[item]
 
 async def hide_order_buttons(context: ContextTypes.DEFAULT_TYPE, poll_id: str) -> None:
     """
     Hide the order buttons by editing the message to remove the inline keyboard.
-    
+
     Args:
         context: Bot context
         poll_id: ID of the poll
     """
-    poll_info = poll_data.get(poll_id)
-    if not poll_info:
-        logger.warning(f"Poll data not found for hiding buttons: {poll_id}")
+    menu = menus.get(poll_id)
+    if not menu:
+        logger.warning("Poll data not found for hiding buttons: %s", poll_id)
         return
-    
-    button_message_id = poll_info.get("button_message_id")
-    chat_id = poll_info.get("chat_id")
-    
-    if not button_message_id or not chat_id:
-        logger.warning(f"Button message ID or chat ID not found for poll {poll_id}")
+
+    if not menu.button_message_id or not menu.chat_id:
+        logger.warning("Button message ID or chat ID not found for poll %s", poll_id)
         return
-    
+
     try:
         # Edit the message to remove the inline keyboard
         await with_retry(
             context.bot.edit_message_reply_markup,
-            chat_id=chat_id,
-            message_id=button_message_id,
+            chat_id=menu.chat_id,
+            message_id=menu.button_message_id,
             reply_markup=None
         )
-        
+
         # Mark the order button as used
-        set_order_button_used(poll_id)
-        
-        logger.info(f"Order buttons hidden for poll {poll_id}")
-        
+        menu.order_button_used = True
+
+        logger.info("Order buttons hidden for poll %s", poll_id)
+
     except Exception as e:
-        logger.error(f"Error hiding order buttons for poll {poll_id}: {e}")
+        logger.error("Error hiding order buttons for poll %s: %s", poll_id, e)
@@ -0,0 +1,157 @@
+"""
+Append-only state persistence for the Telegram Food Poll Bot.
+
+Menu state lives in memory for speed; every mutation is additionally
+appended as one JSON line to an event log by a background writer thread,
+so handlers never block on disk. On startup the log is replayed to
+rebuild open polls, making restarts and deploys lossless.
+"""
+
+import datetime
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+from .config import STATE_LOG_FILE
+
+logger = logging.getLogger(__name__)
+
+# Single writer thread keeps appends ordered without locking and keeps
+# file I/O off the event loop
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="state-log")
+_log_file = None
+
+def _get_log_file():
+    global _log_file
+    if _log_file is None:
+        _log_file = open(STATE_LOG_FILE, "a", encoding="utf-8")
+    return _log_file
+
+def _append(line: str) -> None:
+    try:
+        f = _get_log_file()
+        f.write(line)
+        f.flush()
+    except OSError as e:
+        logger.error("Failed to append state event: %s", e)
+
+def record_event(event: Dict[str, Any]) -> None:
+    """
+    Queue a state event for append to the log.
+
+    Fire-and-forget: serialization happens inline (cheap), the disk write
+    happens on the writer thread, and the caller never waits.
+    """
+    event.setdefault("ts", time.time())
+    _writer.submit(_append, json.dumps(event, ensure_ascii=False) + "\n")
+
+def record_menu_created(poll_id: str, options, chat_id: int, message_id: int,
+                        button_message_id: int) -> None:
+    """Record creation of a menu poll."""
+    record_event({
+        "type": "menu",
+        "poll_id": poll_id,
+        "options": list(options),
+        "chat_id": chat_id,
+        "message_id": message_id,
+        "button_message_id": button_message_id,
+    })
+
+def record_poll_answer(poll_id: str, user_id: int, user_name: str, selections) -> None:
+    """Record a user's current selections for a poll."""
+    record_event({
+        "type": "answer",
+        "poll_id": poll_id,
+        "user_id": user_id,
+        "name": user_name,
+        "selections": list(selections),
+    })
+
+def record_menu_closed(poll_id: str) -> None:
+    """Record that a menu's order was closed and its state released."""
+    record_event({"type": "close", "poll_id": poll_id})
+
+def record_chat_added(chat_id: int) -> None:
+    """Record a chat subscribing to scheduled messages."""
+    record_event({"type": "chat_add", "chat_id": chat_id})
+
+def record_chat_removed(chat_id: int) -> None:
+    """Record a chat leaving scheduled messages (opt-out or dead chat)."""
+    record_event({"type": "chat_remove", "chat_id": chat_id})
+
+def replay_event_log() -> int:
+    """
+    Rebuild in-memory menu state from the event log.
+
+    Called once at startup, before polling begins. Returns the number of
+    open menus restored.
+    """
+    # Imported here to avoid a circular import at module load
+    from .menu_processor import MenuState, UserSelection, menus, purge_stale_menus
+    from .scheduler import chat_ids_for_scheduled_messages
+
+    if not os.path.exists(STATE_LOG_FILE):
+        return 0
+
+    replayed = 0
+    with open(STATE_LOG_FILE, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning("Skipping corrupt state event: %r", line[:120])
+                continue
+
+            event_type = event.get("type")
+            if event_type == "menu":
+                # Restore the creation time from the event timestamp so
+                # the TTL sweep still applies to replayed menus
+                ts = event.get("ts")
+                created_at = (
+                    datetime.datetime.fromtimestamp(ts, tz=datetime.timezone.utc)
+                    if ts else None
+                )
+                menus[event["poll_id"]] = MenuState(
+                    options=tuple(event["options"]),
+                    chat_id=event["chat_id"],
+                    message_id=event["message_id"],
+                    created_at=created_at,
+                    button_message_id=event.get("button_message_id"),
+                )
+                replayed += 1
+            elif event_type == "answer":
+                menu = menus.get(event["poll_id"])
+                if not menu:
+                    continue
+                user_id = event["user_id"]
+                prev = menu.selections.get(user_id)
+                previous = prev.selections if prev else frozenset()
+                current = set(event.get("selections", []))
+                menu.selections[user_id] = UserSelection(
+                    name=event.get("name") or f'User{user_id}',
+                    selections=current,
+                )
+                for item in current - previous:
+                    menu.orders[item] += 1
+                for item in previous - current:
+                    new_count = menu.orders[item] - 1
+                    if new_count > 0:
+                        menu.orders[item] = new_count
+                    else:
+                        menu.orders.pop(item, None)
+            elif event_type == "close":
+                menus.pop(event.get("poll_id"), None)
+            elif event_type == "chat_add":
+                chat_ids_for_scheduled_messages.add(event["chat_id"])
+            elif event_type == "chat_remove":
+                chat_ids_for_scheduled_messages.discard(event["chat_id"])
+
+    purge_stale_menus()
+    logger.info("Replayed state log: %d open menus restored", len(menus))
+    return len(menus)
@@ -2,37 +2,84 @@
 Scheduler functionality for the Telegram Food Poll Bot.
 """
 
+import asyncio
 import datetime
 import logging
 import zoneinfo
 from typing import Set
+from telegram.error import BadRequest, Forbidden
 from telegram.ext import Application, ContextTypes
 from .config import TIMEZONE, SCHEDULED_MESSAGE_TIME, DAILY_MESSAGE
+from .persistence import record_chat_added, record_chat_removed
 from .utils import remove_job_if_exists
 
 logger = logging.getLogger(__name__)
 
-# Global storage for chat IDs (in production, this should be persistent)
+# Resolved once at import: ZoneInfo construction reads the tz database
+# from disk on first build, and the configured time never changes
+_TZ = zoneinfo.ZoneInfo(TIMEZONE)
+_SCHEDULED_TIME = datetime.time.fromisoformat(SCHEDULED_MESSAGE_TIME).replace(tzinfo=_TZ)
+_ALL_DAYS = (0, 1, 2, 3, 4, 5, 6)
+
+# Global storage for chat IDs; mutations are recorded to the state log
+# and replayed on startup, so subscriptions survive restarts
 chat_ids_for_scheduled_messages: Set[int] = set()
 
+# Bounded fan-out concurrency: stay under Telegram's ~30 msg/sec global
+# cap while still overlapping the network waits
+_SEND_CONCURRENCY = 25
+
+async def _send_one(semaphore: asyncio.Semaphore, context: ContextTypes.DEFAULT_TYPE, chat_id: int) -> None:
+    """Send the daily message to one chat under the shared semaphore."""
+    async with semaphore:
+        # The chat may have opted out while earlier sends were in
+        # flight; re-check the live set before sending
+        if chat_id not in chat_ids_for_scheduled_messages:
+            return
+        await context.bot.send_message(
+            chat_id=chat_id,
+            text=DAILY_MESSAGE
+        )
+
 async def send_scheduled_message(context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Send scheduled message to all stored chat IDs.
-    
+
+    Sends run concurrently under a semaphore instead of serially, so
+    total fan-out time is bounded by the slowest batch rather than the
+    sum of every round-trip.
+
     Args:
         context: Bot context
     """
-    logger.info(f"Attempting to send scheduled message at {datetime.datetime.now()}")
-    
-    for chat_id in list(chat_ids_for_scheduled_messages):
-        try:
-            await context.bot.send_message(
-                chat_id=chat_id,
-                text=DAILY_MESSAGE
-            )
-            logger.info(f"Message sent to {chat_id}")
-        except Exception as e:
-            logger.error(f"Failed to send to {chat_id}: {e}")
+    logger.info("Attempting to send scheduled message at %s", datetime.datetime.now())
+
+    if not chat_ids_for_scheduled_messages:
+        return
+
+    # Immutable snapshot so handler-driven set mutations during the
+    # fan-out can't change what we iterate
+    snapshot = tuple(chat_ids_for_scheduled_messages)
+    semaphore = asyncio.Semaphore(_SEND_CONCURRENCY)
+    tasks = [
+        asyncio.create_task(_send_one(semaphore, context, chat_id))
+        for chat_id in snapshot
+    ]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    # Failures come back as values, so one pass logs them lazily and a
+    # single line summarizes the batch
+    failed = 0
+    for chat_id, result in zip(snapshot, results):
+        if isinstance(result, Exception):
+            failed += 1
+            logger.error("Failed to send to %s: %s", chat_id, result)
+            # A blocked bot or deleted chat will fail the same way every
+            # day; drop it so future broadcasts skip the round-trip
+            if isinstance(result, (Forbidden, BadRequest)):
+                remove_chat_from_scheduled_messages(chat_id)
+                logger.info("Pruned unreachable chat %s from scheduled messages", chat_id)
+    logger.info("Scheduled message fan-out done: %d sent, %d failed", len(snapshot) - failed, failed)
 
 def add_chat_for_scheduled_messages(chat_id: int) -> None:
     """
@@ -41,8 +88,10 @@ def add_chat_for_scheduled_messages(chat_id: int) -> None:
     Args:
         chat_id: Telegram chat ID
     """
-    chat_ids_for_scheduled_messages.add(chat_id)
-    logger.info(f"Added chat {chat_id} for scheduled messages")
+    if chat_id not in chat_ids_for_scheduled_messages:
+        chat_ids_for_scheduled_messages.add(chat_id)
+        record_chat_added(chat_id)
+        logger.info("Added chat %s for scheduled messages", chat_id)
 
 def remove_chat_from_scheduled_messages(chat_id: int) -> None:
     """
@@ -51,8 +100,10 @@ def remove_chat_from_scheduled_messages(chat_id: int) -> None:
     Args:
         chat_id: Telegram chat ID
     """
-    chat_ids_for_scheduled_messages.discard(chat_id)
-    logger.info(f"Removed chat {chat_id} from scheduled messages")
+    if chat_id in chat_ids_for_scheduled_messages:
+        chat_ids_for_scheduled_messages.discard(chat_id)
+        record_chat_removed(chat_id)
+        logger.info("Removed chat %s from scheduled messages", chat_id)
 
 async def setup_scheduler(application: Application) -> None:
     """
@@ -64,24 +115,20 @@ async def setup_scheduler(application: Application) -> None:
     # Remove existing job if it exists
     remove_job_if_exists("daily_message", application)
     
-    # Parse scheduled time
     try:
-        hour, minute = map(int, SCHEDULED_MESSAGE_TIME.split(':'))
-        phnom_penh_timezone = zoneinfo.ZoneInfo(TIMEZONE)
-        scheduled_time = datetime.time(hour=hour, minute=minute, tzinfo=phnom_penh_timezone)
-        
-        # Schedule daily message
+        # Schedule daily message; time and day constants are precomputed
+        # at module load
         application.job_queue.run_daily(
             send_scheduled_message,
-            time=scheduled_time,
-            days=tuple(range(7)),  # All days of the week
+            time=_SCHEDULED_TIME,
+            days=_ALL_DAYS,
             name="daily_message"
         )
-        
-        logger.info(f"Scheduled daily message for {scheduled_time} ({TIMEZONE} time)")
+
+        logger.info("Scheduled daily message for %s (%s time)", _SCHEDULED_TIME, TIMEZONE)
         
     except Exception as e:
-        logger.error(f"Failed to setup scheduler: {e}")
+        logger.error("Failed to setup scheduler: %s", e)
 
 def get_scheduled_chats() -> Set[int]:
     """
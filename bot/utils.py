@@ -3,26 +3,65 @@ Utility functions for the Telegram Food Poll Bot.
 """
 
 import asyncio
-import re
+import random
 import logging
+import sys
+from collections import defaultdict
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
-from telegram.error import NetworkError, TimedOut
-from telegram import Update
-from telegram.ext import ContextTypes, Application
+from telegram.error import BadRequest, NetworkError, RetryAfter, TimedOut
+from telegram.ext import Application
 
 logger = logging.getLogger(__name__)
 
+# "Today's food" header; compared via a fixed-length slice, which beats
+# the generic startswith machinery for this always-checked prefix
+_MENU_HEADER = "ម្ហូបថ្ងៃ"
+_MENU_HEADER_LEN = len(_MENU_HEADER)
+
+# Cheap probes for the fast-reject path: a menu line can only start at
+# the beginning of the text or right after a newline, with one of these
+# digits (Khmer ១២៣៤៥៦ or ASCII 1-6)
+_MENU_STARTS = frozenset('១២៣៤៥៦123456')
+_NEWLINE_DIGIT_PROBES = tuple('\n' + d for d in '១២៣៤៥៦123456')
+
+# The digit prefixes only cover 1-6, so a menu can never yield more
+# options than this; scanning past it is wasted work
+_MAX_MENU_OPTIONS = 6
+
 async def with_retry(func, *args, max_retries: int = 3, **kwargs):
-    """Execute a function with retry logic for network operations."""
+    """
+    Execute a function with retry logic for network operations.
+
+    Telegram flood-wait responses (RetryAfter) are honoured by sleeping
+    exactly the server-advised delay; transient network errors back off
+    exponentially. Both delays carry a little jitter so concurrent
+    retries don't stampede the API together.
+    """
     for attempt in range(max_retries):
         try:
             return await func(*args, **kwargs)
+        except BadRequest as e:
+            # An edit that changes nothing is already in the desired
+            # state; retrying would just fail the same way
+            if "message is not modified" in str(e).lower():
+                logger.debug("Edit was a no-op, treating as success: %s", e)
+                return None
+            raise
+        except RetryAfter as e:
+            if attempt == max_retries - 1:
+                logger.error("Failed after %d attempts: %s", max_retries, e)
+                raise
+            delay = e.retry_after + random.uniform(0, 0.25)
+            logger.warning("Rate limited: %s. Retrying in %.2f seconds...", e, delay)
+            await asyncio.sleep(delay)
         except (NetworkError, TimedOut) as e:
             if attempt == max_retries - 1:
-                logger.error(f"Failed after {max_retries} attempts: {e}")
+                logger.error("Failed after %d attempts: %s", max_retries, e)
                 raise
-            logger.warning(f"Network error: {e}. Retrying in {2**attempt} seconds...")
-            await asyncio.sleep(2**attempt)
+            delay = min(30, 2 ** attempt) + random.uniform(0, 1)
+            logger.warning("Network error: %s. Retrying in %.2f seconds...", e, delay)
+            await asyncio.sleep(delay)
 
 def extract_menu_options(text: str) -> List[str]:
     """
@@ -35,89 +74,131 @@ def extract_menu_options(text: str) -> List[str]:
         List of menu options without numbers
     """
     options = []
-    
-    # Look for lines starting with Khmer numbers (១២៣៤៥៦) or standard numbers (1-6) followed by a dot
-    for line in text.split('\n'):
+    seen = set()
+
+    # splitlines handles \r\n too and avoids re-scanning for '\n'
+    for line in text.splitlines():
         line = line.strip()
-        if re.match(r'^[១២៣៤៥៦1-6]\.\s*.+', line):
-            option_text = re.sub(r'^[១២៣៤៥៦1-6]\.\s*', '', line)
-            if option_text and option_text not in options:
+        # Two scalar checks instead of probing twelve prefixes: Khmer
+        # digits are single code points, so the dot is always at index 1
+        if line[:1] in _MENU_STARTS and line[1:2] == '.':
+            # Interning lets the daily repeats of the same dishes share
+            # one string object across polls, and makes the Counter/set
+            # lookups on them start with a pointer comparison
+            option_text = sys.intern(line[2:].lstrip())
+            # Dedup via a set: O(1) membership instead of scanning the
+            # options list per line
+            if option_text and option_text not in seen:
+                seen.add(option_text)
                 options.append(option_text)
-    
+                if len(options) >= _MAX_MENU_OPTIONS:
+                    # Trailing content in long forwards can't add more
+                    break
+
     return options
 
+def parse_menu(text: str) -> Optional[List[str]]:
+    """
+    Detect a food menu and extract its options in a single pass.
+
+    Fuses is_food_menu_text and extract_menu_options so the text is
+    split and scanned once instead of detection and extraction each
+    walking it separately.
+
+    Args:
+        text: Stripped message text
+
+    Returns:
+        The extracted options if the text is a food menu, otherwise None
+    """
+    if not text:
+        return None
+
+    options = extract_menu_options(text)
+    if len(options) >= 2 or text[:_MENU_HEADER_LEN] == _MENU_HEADER:
+        return options
+    return None
+
+@lru_cache(maxsize=2048)
 def is_food_menu_text(text: str) -> bool:
     """
     Check if the given text appears to be a food menu.
-    
+
+    Results are cached per text so repeated forwards of the same menu
+    skip the scan entirely. Callers are expected to pass pre-stripped
+    text (handle_message strips once); stripping again here would just
+    reallocate the string and split the cache across variants.
+
     Args:
-        text: Text to check
-        
+        text: Stripped text to check
+
     Returns:
         True if text appears to be a food menu, False otherwise
     """
     if not text:
         return False
-        
-    text = text.strip()
-    
+
     # Check if it starts with "ម្ហូបថ្ងៃ" (today's food)
-    if text.startswith("ម្ហូបថ្ងៃ"):
+    if text[:_MENU_HEADER_LEN] == _MENU_HEADER:
         return True
-    
-    # Check if it contains numbered menu items
-    numbered_items = re.findall(r'^[១២៣៤៥៦1-6]\.\s*.+', text, re.MULTILINE)
-    return len(numbered_items) >= 2
 
-def format_order_summary(order_items: Dict[str, int], order_name: str = "Seyha", user_selections: Optional[Dict[int, Dict[str, Any]]] = None) -> str:
+    # Too short to hold two numbered menu lines — skip the line scan
+    if len(text) < 7:
+        return False
+
+    # Cheap rejection before splitting: a menu line starts either at
+    # position 0 or right after a newline, so one char check plus
+    # C-speed substring scans drop most chatter
+    if text[0] not in _MENU_STARTS and not any(p in text for p in _NEWLINE_DIGIT_PROBES):
+        return False
+
+    # Count numbered lines with the same scalar checks the extractor
+    # uses, bailing out as soon as two are found
+    count = 0
+    for line in text.splitlines():
+        line = line.lstrip()
+        if line[:1] in _MENU_STARTS and line[1:2] == '.':
+            count += 1
+            if count >= 2:
+                return True
+    return False
+
+def format_order_summary(order_items: Dict[str, int], order_name: str = "Seyha", user_selections: Optional[Dict[int, Any]] = None) -> str:
     """
     Format order items into a readable summary with voter details.
-    
+
     Args:
         order_items: Dictionary mapping item names to quantities
         order_name: Name for the order
-        user_selections: Dictionary mapping user_id to user data (selections and name)
-        
+        user_selections: Dictionary mapping user_id to UserSelection tuples
+
     Returns:
         Formatted order summary string
     """
     if not order_items:
         return ""
-    
-    # Build the main order summary
-    order_lines = [f"- {item} x{qty}" for item, qty in order_items.items()]
-
-    # Determine who placed the order
-    if user_selections and isinstance(user_selections, dict):
-        # Try to get the first user's name if available
-        first_user = next(iter(user_selections.values()), None)
-        order_by = first_user.get('name', 'Unknown') if isinstance(first_user, dict) else 'Unknown'
-    else:
-        order_by = 'Unknown'
-
-    # Build the summary
-    summary_lines = [
-        f"🛒 Name: {order_name}",
-        # f"👤 Order By: {order_by}",
-        "------------------",
-        *order_lines,
-        "------------------"
-    ]
-    
+
+    # Build the summary into one flat list; extend with a generator so
+    # no intermediate line list is materialized
+    summary_lines = [f"🛒 Name: {order_name}", "------------------"]
+    summary_lines.extend(f"- {item} x{qty}" for item, qty in order_items.items())
+    summary_lines.append("------------------")
+
     # Add detail section if user selections are provided
     if user_selections:
         summary_lines.append("Detail:")
-        
-        # Create a mapping of items to voters
-        item_voters = {}
-        for user_id, user_data in user_selections.items():
-            user_name = user_data.get('name', f'User{user_id}')
-            selections = user_data.get('selections', [])
-            
-            for item in selections:
-                if item in order_items:  # Only include items that are actually ordered
-                    if item not in item_voters:
-                        item_voters[item] = []
+
+        # Create a mapping of items to voters; the keys view gives O(1)
+        # membership without re-reading order_items per iteration
+        order_keys = order_items.keys()
+        item_voters = defaultdict(list)
+        for user_data in user_selections.values():
+            if not user_data.selections:
+                continue
+            user_name = user_data.name
+
+            for item in user_data.selections:
+                if item in order_keys:  # Only include items that are actually ordered
                     item_voters[item].append(user_name)
         
         # Add voter details for each item
@@ -129,6 +210,50 @@ def format_order_summary(order_items: Dict[str, int], order_name: str = "Seyha",
     
     return "\n".join(summary_lines)
 
+def split_message(text: str, limit: int = 3500) -> List[str]:
+    """
+    Split text into chunks that stay under Telegram's message size cap.
+
+    Splits on newline boundaries where possible so formatted summaries
+    stay readable; a single oversized line is hard-split as a last resort.
+
+    Args:
+        text: Text to split
+        limit: Maximum characters per chunk
+
+    Returns:
+        List of message chunks in order
+    """
+    if len(text) <= limit:
+        return [text]
+
+    chunks = []
+    current = []
+    current_len = 0
+
+    for line in text.split('\n'):
+        # Hard-split lines that alone exceed the limit
+        while len(line) > limit:
+            if current:
+                chunks.append('\n'.join(current))
+                current = []
+                current_len = 0
+            chunks.append(line[:limit])
+            line = line[limit:]
+
+        if current and current_len + len(line) + 1 > limit:
+            chunks.append('\n'.join(current))
+            current = []
+            current_len = 0
+
+        current.append(line)
+        current_len += len(line) + 1
+
+    if current:
+        chunks.append('\n'.join(current))
+
+    return chunks
+
 def remove_job_if_exists(name: str, application: Application) -> bool:
     """
     Remove job with given name from the job queue.
@@ -67,6 +67,15 @@ def test_utils():
         options = extract_menu_options(test_menu)
         assert len(options) == 3, f"Expected 3 options, got {len(options)}"
         print("✓ Option extraction works")
+
+        # Test message splitting
+        from bot.utils import split_message
+        long_text = "\n".join(f"- item {i}" for i in range(100))
+        chunks = split_message(long_text, limit=200)
+        assert all(len(chunk) <= 200 for chunk in chunks), "Chunk exceeds limit"
+        assert "\n".join(chunks) == long_text, "Chunks don't reassemble to original"
+        assert split_message("short") == ["short"], "Short text should be one chunk"
+        print("✓ Message splitting works")
         
         return True
         